@@ -1,7 +1,8 @@
-from supabase import create_client
+from supabase._async.client import AsyncClient
 import os
+import asyncio
 from dotenv import load_dotenv
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Set
 import logging
 from datetime import datetime
 
@@ -16,58 +17,139 @@ class SupabaseClient:
         if not all([supabase_url, supabase_key]):
             raise ValueError("Missing Supabase credentials in environment variables")
             
-        self.client = create_client(supabase_url, supabase_key)
+        # supabase.create_client returns the sync client, whose execute() can't be awaited.
+        # The async client is built directly, as its create() factory is a coroutine and
+        # only adds a session token lookup that a service key doesn't need.
+        self.client = AsyncClient(supabase_url, supabase_key)
 
-    async def store_publication(self, publication_data: Dict) -> Optional[Dict]:
+        # Publications already in the database, filled by load_seen_publications
+        self._doi_seen: Set[str] = set()
+        self._title_seen: Set[str] = set()
+        self._seen_loaded = False
+
+    async def load_seen_publications(self, page_size: int = 1000) -> None:
+        """Preload the DOIs and titles of stored publications to skip per-publication lookups"""
         try:
-            # Check if publication already exists
-            existing = await self._find_existing_publication(publication_data)
-            if existing:
-                self.logger.info(f"Publication already exists: {publication_data['title']}")
-                return existing
-
-            # Store the publication
-            response = await self.client.table('publications').insert({
-                'title': publication_data['title'],
-                'authors': publication_data['authors'],
-                'abstract': publication_data.get('abstract', ''),
-                'publication_date': publication_data.get('publication_date', ''),
-                'department': publication_data.get('department', ''),
-                'url': publication_data.get('url', ''),
-                'doi': publication_data.get('doi', ''),
-                'publication_type': publication_data.get('publication_type', ''),
-                'scraped_at': datetime.utcnow().isoformat(),
-                'processed': False
-            }).execute()
-            
-            self.logger.info(f"Successfully stored publication: {publication_data['title']}")
-            return response.data[0]
+            doi_seen = set()
+            title_seen = set()
+            start = 0
+            while True:
+                # PostgREST caps the rows per response, so page through the table
+                response = await self.client.table('publications').select('doi, title').range(start, start + page_size - 1).execute()
+                for row in response.data:
+                    if row.get('doi'):
+                        doi_seen.add(row['doi'])
+                    title_seen.add(row['title'])
+                if len(response.data) < page_size:
+                    break
+                start += page_size
+
+            self._doi_seen = doi_seen
+            self._title_seen = title_seen
+            self._seen_loaded = True
+            self.logger.info(f"Loaded {len(doi_seen)} DOIs and {len(title_seen)} titles of stored publications")
+        except Exception as e:
+            self.logger.error(f"Error loading stored publications: {e}")
+
+    async def store_publications_bulk(self, publications: List[Dict], skip_seen: bool = True) -> List[Dict]:
+        """Store many publications with as few round-trips as possible.
+
+        Publications with a DOI go out in a single upsert deduplicated by the unique index
+        on doi. Publications without one still need the title and authors check.
+        With skip_seen, publications that are already stored (known DOIs, or a title and
+        authors match) are skipped and not returned, so only new rows come back; without
+        it, every stored row is returned.
+        """
+        try:
+            # Postgres rejects an upsert that touches the same row twice, so dedupe DOIs first.
+            # 'processed' is left out so existing rows keep their flag and new rows get the default.
+            doi_rows = {}
+            without_doi = []
+            for publication in publications:
+                row = self._to_row(publication)
+                if skip_seen and row['doi'] in self._doi_seen:
+                    continue
+                if row['doi']:
+                    doi_rows[row['doi']] = row
+                else:
+                    without_doi.append(publication)
+
+            stored = []
+            if doi_rows:
+                response = await self.client.table('publications').upsert(
+                    list(doi_rows.values()), on_conflict='doi', ignore_duplicates=False
+                ).execute()
+                stored.extend(response.data)
+                for row in doi_rows.values():
+                    self._mark_seen(row)
+
+            if without_doi:
+                existing = await asyncio.gather(*[
+                    self._find_existing_publication(publication, skip_seen) for publication in without_doi
+                ])
+                # Like known DOIs, publications that are already stored are only returned without skip_seen
+                if not skip_seen:
+                    stored.extend(row for row in existing if row)
+                new_rows = [
+                    {**self._to_row(publication), 'processed': False}
+                    for publication, row in zip(without_doi, existing)
+                    if not row
+                ]
+                if new_rows:
+                    response = await self.client.table('publications').insert(new_rows).execute()
+                    stored.extend(response.data)
+                    for row in new_rows:
+                        self._mark_seen(row)
+
+            self.logger.info(f"Successfully stored {len(stored)} publications")
+            return stored
             
         except Exception as e:
-            self.logger.error(f"Error storing publication: {e}")
+            self.logger.error(f"Error storing publications: {e}")
+            return []
+
+    def _mark_seen(self, row: Dict) -> None:
+        if row.get('doi'):
+            self._doi_seen.add(row['doi'])
+        self._title_seen.add(row['title'])
+
+    def _to_row(self, publication_data: Dict) -> Dict:
+        """Map scraped publication data to a publications table row."""
+        return {
+            'title': publication_data['title'],
+            'authors': publication_data['authors'],
+            'abstract': publication_data.get('abstract', ''),
+            'publication_date': publication_data.get('publication_date', ''),
+            'department': publication_data.get('department', ''),
+            'url': publication_data.get('url', ''),
+            # Missing DOIs are stored as NULL so they don't collide in the unique index
+            'doi': publication_data.get('doi') or None,
+            'publication_type': publication_data.get('publication_type', ''),
+            'scraped_at': datetime.utcnow().isoformat()
+        }
+
+    async def _find_existing_publication(self, publication_data: Dict, skip_seen: bool = True) -> Optional[Dict]:
+        """Check if a publication without DOI already exists using title+authors"""
+        # A title that was never stored can't have a duplicate, so skip the query
+        if skip_seen and self._seen_loaded and publication_data['title'] not in self._title_seen:
             return None
 
-    async def _find_existing_publication(self, publication_data: Dict) -> Optional[Dict]:
-        """Check if publication already exists using DOI or title+authors"""
         try:
-            if publication_data.get('doi'):
-                response = await self.client.table('publications').select('*').eq('doi', publication_data['doi']).execute()
-                if response.data:
-                    return response.data[0]
-
-            # If no DOI or not found by DOI, check title and authors
-            response = await self.client.table('publications').select('*').eq('title', publication_data['title']).execute()
+            # Match on title and overlapping authors in the database
+            authors = self._quote_array_values(publication_data['authors'])
+            response = await self.client.table('publications').select('*').eq('title', publication_data['title']).ov('authors', authors).limit(1).execute()
             if response.data:
-                stored_authors = set(response.data[0]['authors'])
-                new_authors = set(publication_data['authors'])
-                if stored_authors.intersection(new_authors):
-                    return response.data[0]
+                return response.data[0]
 
             return None
         except Exception as e:
             self.logger.error(f"Error checking existing publication: {e}")
             return None
 
+    def _quote_array_values(self, values: List[str]) -> List[str]:
+        """Quote values for a Postgres array literal, as author names may contain commas or quotes"""
+        return ['"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"' for value in values]
+
     async def mark_as_processed(self, publication_id: str) -> bool:
         try:
             await self.client.table('publications').update({
@@ -77,4 +159,50 @@ class SupabaseClient:
             return True
         except Exception as e:
             self.logger.error(f"Error marking publication as processed: {e}")
-            return False 
\ No newline at end of file
+            return False
+
+    async def store_analyses_bulk(self, analyses: List[Dict]) -> bool:
+        """Store analysis results in a single insert into publication_analyses"""
+        if not analyses:
+            return True
+        try:
+            await self.client.table('publication_analyses').insert(analyses).execute()
+            self.logger.info(f"Successfully stored {len(analyses)} analyses")
+            return True
+        except Exception as e:
+            self.logger.error(f"Error storing analyses: {e}")
+            return False
+
+    async def get_cached_analyses(self, hashes: List[str]) -> Dict[str, Dict]:
+        """Fetch cached analysis results for the given content hashes"""
+        try:
+            response = await self.client.table('analyses_cache').select('hash, result').in_('hash', hashes).execute()
+            return {row['hash']: row['result'] for row in response.data}
+        except Exception as e:
+            self.logger.error(f"Error fetching cached analyses: {e}")
+            return {}
+
+    async def store_cached_analyses(self, results: Dict[str, Dict]) -> bool:
+        """Cache analysis results by content hash, keeping results that are already cached"""
+        try:
+            rows = [{'hash': content_hash, 'result': result} for content_hash, result in results.items()]
+            await self.client.table('analyses_cache').upsert(
+                rows, on_conflict='hash', ignore_duplicates=True
+            ).execute()
+            return True
+        except Exception as e:
+            self.logger.error(f"Error caching analyses: {e}")
+            return False
+
+    async def get_publications(self, publication_ids: List[str], chunk_size: int = 200) -> List[Dict]:
+        """Fetch publications by id, in chunks so the id filter stays within URL length limits"""
+        try:
+            chunks = [publication_ids[start:start + chunk_size] for start in range(0, len(publication_ids), chunk_size)]
+            responses = await asyncio.gather(*[
+                self.client.table('publications').select('*').in_('id', chunk).execute()
+                for chunk in chunks
+            ])
+            return [row for response in responses for row in response.data]
+        except Exception as e:
+            self.logger.error(f"Error fetching publications: {e}")
+            return []
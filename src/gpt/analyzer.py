@@ -1,21 +1,90 @@
-from openai import AsyncOpenAI
+from openai import AsyncOpenAI, RateLimitError, APIConnectionError, InternalServerError
 import os
+import asyncio
 from dotenv import load_dotenv
 from typing import Dict, Optional, List, Tuple
-import json
+import hashlib
+import orjson
 import logging
 from datetime import datetime
+from gpt.rate_limiter import RateLimiter
+from utils.http import HTTP
+from database.supabase_client import SupabaseClient
 
 load_dotenv()
 
+ANALYSIS_SYSTEM_PROMPT = """You are an expert in analyzing academic research for commercial viability and startup potential.
+Analyze the given publication data and provide a detailed assessment of its commercial potential.
+Focus on concrete applications, market opportunities, and implementation feasibility.
+Be critical and realistic in your assessment.
+
+Return your analysis in JSON format with numerical scores (0-100) for:
+- innovation_score: novelty and uniqueness of the solution
+- market_potential: size and accessibility of target market
+- technical_feasibility: technical complexity and implementation challenges
+- implementation_readiness: current stage of development
+- competitive_advantage: strength compared to existing solutions
+
+Also include:
+- summary: Brief overview of commercial potential
+- innovation_analysis: Detailed assessment of the innovation
+- market_analysis: Market opportunity assessment
+- technical_assessment: Technical feasibility evaluation
+- recommended_path: Suggested commercialization approach
+- key_challenges: List of main obstacles
+- target_industries: List of relevant industries
+- time_to_market_months: Estimated months to market
+- required_resources: List of needed resources"""
+
+SCORING_SYSTEM_PROMPT = """You are an expert in evaluating research commercialization potential.
+For each criterion, provide:
+1. A score from 0-100
+2. A detailed explanation of the score
+3. Specific evidence from the publication
+4. Potential risks and opportunities
+
+Report your evaluation through the score_publication function, with each main criterion containing:
+- score: numerical score
+- explanation: detailed reasoning
+- evidence: list of supporting evidence
+- risks: list of potential risks
+- opportunities: list of potential opportunities"""
+
+BATCH_RESPONSE_INSTRUCTIONS = """You will receive several publications at once, each identified by an "id".
+Evaluate every publication independently and return a JSON object of the form
+{"results": [{"id": "<publication id>", ...fields described above...}, ...]}
+with exactly one entry per publication."""
+
+BATCH_ANALYSIS_SYSTEM_PROMPT = f"{ANALYSIS_SYSTEM_PROMPT}\n\n{BATCH_RESPONSE_INSTRUCTIONS}"
+
+BATCH_SCORING_SYSTEM_PROMPT = f"{SCORING_SYSTEM_PROMPT}\n\n{BATCH_RESPONSE_INSTRUCTIONS}"
+
 class PublicationAnalyzer:
-    def __init__(self):
+    def __init__(self, cache: Optional[SupabaseClient] = None):
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("Missing OpenAI API key in environment variables")
             
-        self.client = AsyncOpenAI(api_key=api_key)
+        # Retries are handled in _create_completion so they also go through the rate limiter
+        self.client = AsyncOpenAI(api_key=api_key, max_retries=0, http_client=HTTP)
         self.logger = logging.getLogger(__name__)
+        # Previous results are looked up by content hash before calling GPT
+        self.cache = cache
+        self.batch_size = int(os.getenv("GPT_BATCH_SIZE", "5"))
+        # A small model handles most publications; scores close to the notification
+        # threshold are re-scored with the larger confirmation model
+        self.model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+        self.confirmation_model = os.getenv("OPENAI_CONFIRMATION_MODEL", "gpt-4o")
+        self.score_threshold = float(os.getenv("SCORE_THRESHOLD", "7.0"))
+        self.confirmation_margin = float(os.getenv("CONFIRMATION_SCORE_MARGIN", "0.5"))
+        self.concurrency = int(os.getenv("OPENAI_CONCURRENCY", "10"))
+        self.max_retries = int(os.getenv("OPENAI_MAX_RETRIES", "5"))
+        # Completion tokens allowed per publication; requests reserve them from the token budget
+        self.max_completion_tokens = int(os.getenv("OPENAI_MAX_COMPLETION_TOKENS", "1500"))
+        self.rate_limiter = RateLimiter(
+            max_requests_per_minute=float(os.getenv("OPENAI_MAX_REQUESTS_PER_MINUTE", "500")),
+            max_tokens_per_minute=float(os.getenv("OPENAI_MAX_TOKENS_PER_MINUTE", "30000"))
+        )
         
         # Define detailed evaluation criteria with weights and subcriteria
         self.evaluation_criteria = {
@@ -61,10 +130,78 @@ class PublicationAnalyzer:
             }
         }
 
+        # The criteria are static, so render their prompt text once
+        self.criteria_descriptions = "\n".join(
+            f"{criterion}:\n" + "\n".join(f"- {sub}: {desc}" 
+            for sub, desc in details['subcriteria'].items())
+            for criterion, details in self.evaluation_criteria.items()
+        )
+
+        # Criteria and their weights in a fixed order, so scoring doesn't walk the nested dict
+        self._criterion_order = tuple(self.evaluation_criteria)
+        self._criterion_weights = tuple(details['weight'] for details in self.evaluation_criteria.values())
+
+        # Detailed scores are returned through strict function calling, so the API
+        # guarantees they match this schema instead of us parsing free-form JSON
+        criterion_schema = {
+            "type": "object",
+            "properties": {
+                "score": {"type": "integer"},
+                "explanation": {"type": "string"},
+                "evidence": {"type": "array", "items": {"type": "string"}},
+                "risks": {"type": "array", "items": {"type": "string"}},
+                "opportunities": {"type": "array", "items": {"type": "string"}}
+            },
+            "required": ["score", "explanation", "evidence", "risks", "opportunities"],
+            "additionalProperties": False
+        }
+        scores_schema = {
+            "type": "object",
+            "properties": {criterion: criterion_schema for criterion in self.evaluation_criteria},
+            "required": list(self.evaluation_criteria),
+            "additionalProperties": False
+        }
+        self.scoring_tool = {
+            "name": "score_publication",
+            "description": "Record the detailed commercialization scores of a publication",
+            "parameters": scores_schema,
+            "strict": True
+        }
+        self.batch_scoring_tool = {
+            "name": "score_publication",
+            "description": "Record the detailed commercialization scores of each publication",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "results": {
+                        "type": "array",
+                        "items": {
+                            **scores_schema,
+                            "properties": {"id": {"type": "string"}, **scores_schema["properties"]},
+                            "required": ["id", *scores_schema["required"]]
+                        }
+                    }
+                },
+                "required": ["results"],
+                "additionalProperties": False
+            },
+            "strict": True
+        }
+
     async def analyze_publication(self, publication_data: Dict) -> Optional[Dict]:
         """Analyze a publication for its commercial and startup potential."""
         try:
             sanitized_data = self._sanitize_publication_data(publication_data)
+            # Without an abstract there is nothing for GPT to assess
+            if not sanitized_data['abstract'].strip():
+                return None
+
+            content_hash = self._content_hash(sanitized_data)
+            cached = await self._get_cached_analyses([content_hash])
+            if content_hash in cached:
+                self.logger.info(f"Using cached analysis: {sanitized_data['title']}")
+                return {**cached[content_hash], 'publication_id': publication_data.get('id')}
+
             initial_analysis = await self._get_gpt_analysis(sanitized_data)
             
             if not initial_analysis:
@@ -75,29 +212,12 @@ class PublicationAnalyzer:
             
             # Calculate final weighted score
             final_score = self._calculate_final_score(detailed_scores)
+            detailed_scores, final_score = await self._confirm_borderline_score(
+                sanitized_data, initial_analysis, detailed_scores, final_score
+            )
             
-            result = {
-                'publication_id': publication_data.get('id'),
-                'analysis_timestamp': datetime.utcnow().isoformat(),
-                'startup_potential_score': final_score,
-                'detailed_analysis': {
-                    'summary': initial_analysis.get('summary', ''),
-                    'scores_and_reasoning': detailed_scores,
-                    'market_analysis': initial_analysis.get('market_analysis', ''),
-                    'technical_assessment': initial_analysis.get('technical_assessment', ''),
-                    'commercialization_strategy': initial_analysis.get('recommended_path', '')
-                },
-                'key_metrics': {
-                    'estimated_time_to_market': initial_analysis.get('time_to_market_months', 0),
-                    'required_investment_level': initial_analysis.get('required_investment', 'medium'),
-                    'risk_level': initial_analysis.get('risk_level', 'medium')
-                },
-                'recommendations': {
-                    'next_steps': initial_analysis.get('recommended_next_steps', []),
-                    'potential_partners': initial_analysis.get('potential_partners', []),
-                    'funding_sources': initial_analysis.get('funding_sources', [])
-                }
-            }
+            result = self._build_result(publication_data, initial_analysis, detailed_scores, final_score)
+            await self._store_cached_analyses({content_hash: result})
             
             self.logger.info(f"Successfully analyzed publication with score {final_score}: {sanitized_data['title']}")
             return result
@@ -106,40 +226,249 @@ class PublicationAnalyzer:
             self.logger.error(f"Error in publication analysis: {e}")
             return None
 
-    async def _get_detailed_scoring(self, publication_data: Dict, initial_analysis: Dict) -> Dict:
-        """Get detailed scores with explanations for each criterion."""
-        try:
-            prompt = self._create_detailed_scoring_prompt(publication_data, initial_analysis)
-            
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
+    async def analyze_publications_batch(self, publications: List[Dict], batch_size: Optional[int] = None) -> List[Optional[Dict]]:
+        """Analyze publications several at a time, sharing one GPT request per batch.
+
+        Returns one result per publication in input order, with None for failed analyses.
+        """
+        return await self._run_in_batches(publications, batch_size, self._analyze_batch)
+
+    async def get_cached_analyses(self, publications: List[Dict]) -> List[Optional[Dict]]:
+        """Look up earlier analyses of the same title and abstract.
+
+        Returns one result per publication in input order, with None where nothing is cached.
+        """
+        hashes = [self._content_hash(self._sanitize_publication_data(publication)) for publication in publications]
+        cached = await self._get_cached_analyses(list(set(hashes)))
+        return [
+            {**cached[content_hash], 'publication_id': publication.get('id')} if content_hash in cached else None
+            for publication, content_hash in zip(publications, hashes)
+        ]
+
+    async def submit_batch(self, publications: List[Dict]) -> str:
+        """Submit the initial analysis of stored publications to the OpenAI Batch API.
+
+        Each request is tagged with the publication's database id as custom_id so the
+        results can be matched up again by retrieve_batch. Returns the batch id.
+        """
+        lines = []
+        for publication in publications:
+            sanitized_data = self._sanitize_publication_data(publication)
+            lines.append(orjson.dumps({
+                "custom_id": str(publication['id']),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._build_request([
                     {
                         "role": "system",
-                        "content": """You are an expert in evaluating research commercialization potential.
-                        For each criterion, provide:
-                        1. A score from 0-100
-                        2. A detailed explanation of the score
-                        3. Specific evidence from the publication
-                        4. Potential risks and opportunities
-                        
-                        Format your response as a JSON object with each main criterion containing:
-                        - score: numerical score
-                        - explanation: detailed reasoning
-                        - evidence: list of supporting evidence
-                        - risks: list of potential risks
-                        - opportunities: list of potential opportunities"""
+                        "content": ANALYSIS_SYSTEM_PROMPT
                     },
                     {
                         "role": "user",
-                        "content": prompt
+                        "content": self._create_analysis_prompt(sanitized_data)
                     }
-                ],
-                response_format={ "type": "json_object" },
-                temperature=0.7
+                ])
+            }))
+        
+        batch_file = await self.client.files.create(
+            file=("publications.jsonl", b"\n".join(lines)),
+            purpose="batch"
+        )
+        batch = await self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        
+        self.logger.info(f"Submitted batch {batch.id} with {len(lines)} publications")
+        return batch.id
+
+    async def retrieve_batch(self, batch_id: str) -> Optional[Dict[str, Dict]]:
+        """Fetch the initial analyses of a submitted batch, keyed by publication id.
+
+        Returns None while the batch is still running.
+        """
+        batch = await self.client.batches.retrieve(batch_id)
+        if batch.status in ("validating", "in_progress", "finalizing"):
+            return None
+        
+        if batch.status != "completed" or not batch.output_file_id:
+            self.logger.error(f"Batch {batch_id} finished with status {batch.status}")
+            return {}
+        
+        content = await self.client.files.content(batch.output_file_id)
+        
+        results = {}
+        for line in content.text.splitlines():
+            if not line:
+                continue
+            try:
+                item = orjson.loads(line)
+                response = item.get('response') or {}
+                if response.get('status_code') != 200:
+                    self.logger.error(f"Batch request {item.get('custom_id')} failed: {item.get('error')}")
+                    continue
+                results[item['custom_id']] = orjson.loads(response['body']['choices'][0]['message']['content'])
+            except Exception as e:
+                self.logger.error(f"Error parsing batch result: {e}")
+        
+        return results
+
+    async def analyze_batch_results(self, publications: List[Dict], initial_analyses: Dict[str, Dict], batch_size: Optional[int] = None) -> List[Optional[Dict]]:
+        """Finish the analysis of publications whose initial analysis came from the Batch API."""
+        async def score(batch_publications: List[Dict]) -> List[Optional[Dict]]:
+            try:
+                batch = {
+                    str(publication['id']): self._sanitize_publication_data(publication)
+                    for publication in batch_publications
+                }
+                results = await self._score_batch(batch_publications, batch, initial_analyses)
+                await self._store_cached_analyses({
+                    self._content_hash(batch[str(publication['id'])]): result
+                    for publication, result in zip(batch_publications, results)
+                    if result
+                })
+                return results
+            except Exception as e:
+                self.logger.error(f"Error scoring batch results: {e}")
+                return [None] * len(batch_publications)
+
+        return await self._run_in_batches(publications, batch_size, score)
+
+    async def _run_in_batches(self, publications: List[Dict], batch_size: Optional[int], worker) -> List[Optional[Dict]]:
+        """Split publications into batches and run them through worker concurrently."""
+        batch_size = batch_size or self.batch_size
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(batch: List[Dict]) -> List[Optional[Dict]]:
+            async with semaphore:
+                return await worker(batch)
+
+        batch_results = await asyncio.gather(*[
+            run(publications[start:start + batch_size])
+            for start in range(0, len(publications), batch_size)
+        ])
+        return [result for results in batch_results for result in results]
+
+    async def _analyze_batch(self, publications: List[Dict]) -> List[Optional[Dict]]:
+        """Run the initial analysis and detailed scoring for one batch of publications."""
+        try:
+            # Scraped publications have no id yet, so key them by their position in the batch
+            batch = {
+                str(index): self._sanitize_publication_data(publication)
+                for index, publication in enumerate(publications)
+            }
+            # Publications without an abstract are skipped, the others are looked up in the cache
+            hashes = {
+                key: self._content_hash(data)
+                for key, data in batch.items()
+                if data['abstract'].strip()
+            }
+            cached = await self._get_cached_analyses(list(hashes.values()))
+            pending = {key: batch[key] for key, content_hash in hashes.items() if content_hash not in cached}
+
+            initial_analyses = await self._get_gpt_analysis_batch(pending) if pending else {}
+            results = await self._score_batch(publications, batch, initial_analyses)
+            await self._store_cached_analyses({
+                hashes[key]: result
+                for key, result in zip(batch, results)
+                if result and key in pending
+            })
+
+            for index, (key, publication) in enumerate(zip(batch, publications)):
+                if key in hashes and hashes[key] in cached:
+                    results[index] = {**cached[hashes[key]], 'publication_id': publication.get('id')}
+            return results
+            
+        except Exception as e:
+            self.logger.error(f"Error in batch publication analysis: {e}")
+            return [None] * len(publications)
+
+    async def _score_batch(self, publications: List[Dict], batch: Dict[str, Dict], initial_analyses: Dict[str, Dict]) -> List[Optional[Dict]]:
+        """Get detailed scores for a batch with initial analyses and build the results."""
+        analyzed = {key: data for key, data in batch.items() if initial_analyses.get(key)}
+        if not analyzed:
+            return [None] * len(publications)
+        
+        detailed_scores = await self._get_detailed_scoring_batch(analyzed, initial_analyses)
+        confirmed = await asyncio.gather(*[
+            self._confirm_borderline_score(
+                data,
+                initial_analyses[key],
+                detailed_scores.get(key, {}),
+                self._calculate_final_score(detailed_scores.get(key, {}))
             )
+            for key, data in analyzed.items()
+        ])
+        scored = dict(zip(analyzed, confirmed))
+        
+        results = []
+        for key, publication in zip(batch, publications):
+            if key not in analyzed:
+                results.append(None)
+                continue
             
-            return json.loads(response.choices[0].message.content)
+            scores, final_score = scored[key]
+            results.append(self._build_result(publication, initial_analyses[key], scores, final_score))
+            self.logger.info(f"Successfully analyzed publication with score {final_score}: {batch[key]['title']}")
+        
+        return results
+
+    def _build_result(self, publication_data: Dict, initial_analysis: Dict, detailed_scores: Dict, final_score: float) -> Dict:
+        """Assemble the analysis result stored and sent with notifications."""
+        return {
+            'publication_id': publication_data.get('id'),
+            'analysis_timestamp': datetime.utcnow().isoformat(),
+            'startup_potential_score': final_score,
+            'detailed_analysis': {
+                'summary': initial_analysis.get('summary', ''),
+                'scores_and_reasoning': detailed_scores,
+                'market_analysis': initial_analysis.get('market_analysis', ''),
+                'technical_assessment': initial_analysis.get('technical_assessment', ''),
+                'commercialization_strategy': initial_analysis.get('recommended_path', '')
+            },
+            'key_metrics': {
+                'estimated_time_to_market': initial_analysis.get('time_to_market_months', 0),
+                'required_investment_level': initial_analysis.get('required_investment', 'medium'),
+                'risk_level': initial_analysis.get('risk_level', 'medium')
+            },
+            'recommendations': {
+                'next_steps': initial_analysis.get('recommended_next_steps', []),
+                'potential_partners': initial_analysis.get('potential_partners', []),
+                'funding_sources': initial_analysis.get('funding_sources', [])
+            }
+        }
+
+    async def _confirm_borderline_score(self, publication_data: Dict, initial_analysis: Dict, detailed_scores: Dict, final_score: float) -> Tuple[Dict, float]:
+        """Re-score publications near the notification threshold with the confirmation model."""
+        if abs(final_score - self.score_threshold) > self.confirmation_margin:
+            return detailed_scores, final_score
+        
+        confirmed_scores = await self._get_detailed_scoring(publication_data, initial_analysis, model=self.confirmation_model)
+        if not confirmed_scores:
+            return detailed_scores, final_score
+        
+        confirmed_score = self._calculate_final_score(confirmed_scores)
+        self.logger.info(f"Confirmed borderline score {final_score} as {confirmed_score}: {publication_data['title']}")
+        return confirmed_scores, confirmed_score
+
+    async def _get_detailed_scoring(self, publication_data: Dict, initial_analysis: Dict, model: Optional[str] = None) -> Dict:
+        """Get detailed scores with explanations for each criterion."""
+        try:
+            prompt = self._create_detailed_scoring_prompt(publication_data, initial_analysis)
+            
+            response = await self._create_completion([
+                {
+                    "role": "system",
+                    "content": SCORING_SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ], model=model, tool=self.scoring_tool)
+            
+            return orjson.loads(response.choices[0].message.tool_calls[0].function.arguments)
             
         except Exception as e:
             self.logger.error(f"Error in detailed scoring: {e}")
@@ -147,12 +476,6 @@ class PublicationAnalyzer:
 
     def _create_detailed_scoring_prompt(self, publication_data: Dict, initial_analysis: Dict) -> str:
         """Create a prompt for detailed scoring analysis."""
-        criteria_descriptions = "\n".join(
-            f"{criterion}:\n" + "\n".join(f"- {sub}: {desc}" 
-            for sub, desc in details['subcriteria'].items())
-            for criterion, details in self.evaluation_criteria.items()
-        )
-        
         return f"""
         Provide a detailed scoring analysis for this publication:
         
@@ -164,7 +487,58 @@ class PublicationAnalyzer:
         
         Please evaluate each criterion:
         
-        {criteria_descriptions}
+        {self.criteria_descriptions}
+        
+        For each criterion:
+        1. Assign a score (0-100)
+        2. Explain your reasoning
+        3. Cite specific evidence from the publication
+        4. Identify risks and opportunities
+        
+        Focus on concrete, practical aspects of commercialization potential.
+        """
+
+    async def _get_detailed_scoring_batch(self, batch: Dict[str, Dict], initial_analyses: Dict[str, Dict]) -> Dict[str, Dict]:
+        """Get detailed scores for a batch of publications, keyed by batch id."""
+        try:
+            prompt = self._create_detailed_scoring_batch_prompt(batch, initial_analyses)
+            
+            response = await self._create_completion([
+                {
+                    "role": "system",
+                    "content": BATCH_SCORING_SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ], tool=self.batch_scoring_tool, publications=len(batch))
+            
+            return self._parse_batch_response(response.choices[0].message.tool_calls[0].function.arguments)
+            
+        except Exception as e:
+            self.logger.error(f"Error in batch detailed scoring: {e}")
+            return {}
+
+    def _create_detailed_scoring_batch_prompt(self, batch: Dict[str, Dict], initial_analyses: Dict[str, Dict]) -> str:
+        """Create a prompt for detailed scoring of several publications."""
+        rows = [
+            {
+                'id': key,
+                'title': data['title'],
+                'abstract': data['abstract'],
+                'initial_analysis_summary': initial_analyses[key].get('summary', '')
+            }
+            for key, data in batch.items()
+        ]
+        return f"""
+        Provide a detailed scoring analysis for each of these publications:
+        
+        {orjson.dumps(rows).decode()}
+        
+        Please evaluate each criterion for every publication:
+        
+        {self.criteria_descriptions}
         
         For each criterion:
         1. Assign a score (0-100)
@@ -178,11 +552,8 @@ class PublicationAnalyzer:
     def _calculate_final_score(self, detailed_scores: Dict) -> float:
         """Calculate the final weighted score with detailed criteria."""
         try:
-            weighted_sum = 0
-            for criterion, details in self.evaluation_criteria.items():
-                if criterion in detailed_scores:
-                    criterion_score = detailed_scores[criterion].get('score', 0)
-                    weighted_sum += criterion_score * details['weight']
+            scores = (detailed_scores.get(criterion, {}).get('score', 0) for criterion in self._criterion_order)
+            weighted_sum = sum(score * weight for score, weight in zip(scores, self._criterion_weights))
             
             # Convert to 1-10 scale and round to one decimal
             return round(weighted_sum / 100 * 10, 1)
@@ -191,48 +562,22 @@ class PublicationAnalyzer:
             return 0.0
 
     async def _get_gpt_analysis(self, publication_data: Dict) -> Optional[Dict]:
-        """Get the GPT-4 analysis of the publication."""
+        """Get the GPT analysis of the publication."""
         try:
             prompt = self._create_analysis_prompt(publication_data)
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are an expert in analyzing academic research for commercial viability and startup potential.
-                        Analyze the given publication data and provide a detailed assessment of its commercial potential.
-                        Focus on concrete applications, market opportunities, and implementation feasibility.
-                        Be critical and realistic in your assessment.
-                        
-                        Return your analysis in JSON format with numerical scores (0-100) for:
-                        - innovation_score: novelty and uniqueness of the solution
-                        - market_potential: size and accessibility of target market
-                        - technical_feasibility: technical complexity and implementation challenges
-                        - implementation_readiness: current stage of development
-                        - competitive_advantage: strength compared to existing solutions
-                        
-                        Also include:
-                        - summary: Brief overview of commercial potential
-                        - innovation_analysis: Detailed assessment of the innovation
-                        - market_analysis: Market opportunity assessment
-                        - technical_assessment: Technical feasibility evaluation
-                        - recommended_path: Suggested commercialization approach
-                        - key_challenges: List of main obstacles
-                        - target_industries: List of relevant industries
-                        - time_to_market_months: Estimated months to market
-                        - required_resources: List of needed resources"""
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                response_format={ "type": "json_object" },
-                temperature=0.7
-            )
+            response = await self._create_completion([
+                {
+                    "role": "system",
+                    "content": ANALYSIS_SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ])
             
-            return json.loads(response.choices[0].message.content)
+            return orjson.loads(response.choices[0].message.content)
             
         except Exception as e:
             self.logger.error(f"Error getting GPT analysis: {e}")
@@ -264,6 +609,131 @@ class PublicationAnalyzer:
         Provide a comprehensive analysis focusing on practical commercial applications.
         """
 
+    async def _get_gpt_analysis_batch(self, batch: Dict[str, Dict]) -> Dict[str, Dict]:
+        """Get the GPT analysis of a batch of publications, keyed by batch id."""
+        try:
+            prompt = self._create_analysis_batch_prompt(batch)
+            
+            response = await self._create_completion([
+                {
+                    "role": "system",
+                    "content": BATCH_ANALYSIS_SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ], publications=len(batch))
+            
+            return self._parse_batch_response(response.choices[0].message.content)
+            
+        except Exception as e:
+            self.logger.error(f"Error getting batch GPT analysis: {e}")
+            return {}
+
+    def _create_analysis_batch_prompt(self, batch: Dict[str, Dict]) -> str:
+        """Create a prompt analyzing several publications in one request."""
+        rows = [
+            {
+                'id': key,
+                'title': data['title'],
+                'abstract': data['abstract'],
+                'department': data['department'],
+                'publication_type': data['publication_type']
+            }
+            for key, data in batch.items()
+        ]
+        
+        return f"""
+        Analyze each of these research publications for its commercial and startup potential:
+        
+        {orjson.dumps(rows).decode()}
+        
+        For every publication, consider:
+        1. What unique problem does this research solve?
+        2. Is there a clear market need for this solution?
+        3. How technically feasible is implementation?
+        4. What resources would be needed for commercialization?
+        5. What are the main technical and market risks?
+        6. How does this compare to existing solutions?
+        7. What is the potential market size and accessibility?
+        8. How long would it take to bring this to market?
+        
+        Provide a comprehensive analysis focusing on practical commercial applications.
+        """
+
+    async def _create_completion(self, messages: List[Dict], model: Optional[str] = None, tool: Optional[Dict] = None, publications: int = 1):
+        """Send a chat completion, pacing it through the rate limiter and retrying with backoff.
+
+        The limiter counts completion tokens against the same budget, so each request reserves
+        its prompt estimate plus max_tokens. The rate limit headers of each response feed back
+        into the limiter.
+        """
+        request = self._build_request(messages, model, tool, publications)
+        estimated_tokens = self._estimate_tokens(messages) + request["max_tokens"]
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire(estimated_tokens)
+            try:
+                response = await self.client.chat.completions.with_raw_response.create(**request)
+                self.rate_limiter.update_from_headers(response.headers)
+                return response.parse()
+            except (RateLimitError, APIConnectionError, InternalServerError) as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = 2 ** attempt
+                self.logger.warning(f"OpenAI request failed ({e}), retrying in {delay}s")
+                await asyncio.sleep(delay)
+
+    def _build_request(self, messages: List[Dict], model: Optional[str] = None, tool: Optional[Dict] = None, publications: int = 1) -> Dict:
+        """Build the chat completion parameters shared by direct and Batch API requests.
+
+        With a tool, the model is forced to answer by calling that function; otherwise
+        it answers in JSON mode. The completion is capped at max_completion_tokens per
+        publication in the request.
+        """
+        request = {
+            "model": model or self.model,
+            "messages": messages,
+            "temperature": 0.7,
+            "max_tokens": self.max_completion_tokens * publications
+        }
+        if tool:
+            request["tools"] = [{"type": "function", "function": tool}]
+            request["tool_choice"] = {"type": "function", "function": {"name": tool["name"]}}
+        else:
+            request["response_format"] = { "type": "json_object" }
+        return request
+
+    def _estimate_tokens(self, messages: List[Dict]) -> int:
+        """Roughly estimate prompt tokens (about four characters per token)."""
+        return sum(len(message['content']) for message in messages) // 4
+
+    def _parse_batch_response(self, content: str) -> Dict[str, Dict]:
+        """Split a batched GPT response into per-publication results keyed by id."""
+        results = {}
+        for item in orjson.loads(content).get('results', []):
+            key = str(item.pop('id', ''))
+            if key:
+                results[key] = item
+        return results
+
+    def _content_hash(self, sanitized_data: Dict) -> str:
+        return hashlib.sha256((sanitized_data['title'] + sanitized_data['abstract']).encode()).hexdigest()
+
+    async def _get_cached_analyses(self, hashes: List[str]) -> Dict[str, Dict]:
+        if not self.cache or not hashes:
+            return {}
+        return await self.cache.get_cached_analyses(hashes)
+
+    async def _store_cached_analyses(self, results: Dict[str, Dict]) -> None:
+        if not self.cache or not results:
+            return
+        # The publication id differs between runs, so it is not part of the cached result
+        await self.cache.store_cached_analyses({
+            content_hash: {key: value for key, value in result.items() if key != 'publication_id'}
+            for content_hash, result in results.items()
+        })
+
     def _sanitize_publication_data(self, publication_data: Dict) -> Dict:
         """Remove sensitive information and prepare data for analysis."""
         return {
@@ -0,0 +1,80 @@
+import asyncio
+import time
+from typing import Mapping, Optional
+
+
+class RateLimiter:
+    """Token bucket pacing OpenAI calls against requests- and tokens-per-minute budgets."""
+
+    def __init__(self, max_requests_per_minute: float, max_tokens_per_minute: float):
+        self.max_requests_per_minute = max_requests_per_minute
+        self.max_tokens_per_minute = max_tokens_per_minute
+        self.available_requests = max_requests_per_minute
+        self.available_tokens = max_tokens_per_minute
+        self._last_refill = time.monotonic()
+        # Created lazily so the lock binds to the loop that actually runs the requests
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """Wait until one request and ``tokens`` tokens fit in the budget, then consume them."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        # A single request larger than the whole budget could otherwise never be sent
+        tokens = min(tokens, self.max_tokens_per_minute)
+
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.available_requests >= 1 and self.available_tokens >= tokens:
+                    self.available_requests -= 1
+                    self.available_tokens -= tokens
+                    return
+
+                missing_requests = max(0.0, 1 - self.available_requests)
+                missing_tokens = max(0.0, tokens - self.available_tokens)
+                await asyncio.sleep(max(
+                    missing_requests * 60 / self.max_requests_per_minute,
+                    missing_tokens * 60 / self.max_tokens_per_minute
+                ))
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """Resync the budget with the x-ratelimit-* headers of an OpenAI response.
+
+        The server counts every request made with the API key, so its numbers replace
+        the local estimate whenever they are available.
+        """
+        limit_requests = self._header_value(headers, 'x-ratelimit-limit-requests')
+        limit_tokens = self._header_value(headers, 'x-ratelimit-limit-tokens')
+        remaining_requests = self._header_value(headers, 'x-ratelimit-remaining-requests')
+        remaining_tokens = self._header_value(headers, 'x-ratelimit-remaining-tokens')
+
+        self._refill()
+        if limit_requests:
+            self.max_requests_per_minute = limit_requests
+        if limit_tokens:
+            self.max_tokens_per_minute = limit_tokens
+        if remaining_requests is not None:
+            self.available_requests = min(remaining_requests, self.max_requests_per_minute)
+        if remaining_tokens is not None:
+            self.available_tokens = min(remaining_tokens, self.max_tokens_per_minute)
+
+    def _header_value(self, headers: Mapping[str, str], name: str) -> Optional[float]:
+        try:
+            return float(headers[name])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+
+        self.available_requests = min(
+            self.max_requests_per_minute,
+            self.available_requests + elapsed * self.max_requests_per_minute / 60
+        )
+        self.available_tokens = min(
+            self.max_tokens_per_minute,
+            self.available_tokens + elapsed * self.max_tokens_per_minute / 60
+        )
@@ -1,23 +1,70 @@
-import json
+import orjson
 import asyncio
-from main import process_publications
+from main import get_services, process_publications, submit_publications_batch, ingest_publications_batch
 import logging
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# The clients' connection pools are bound to an event loop, so every invocation
+# runs on this one instead of a fresh loop that is closed afterwards
+_loop = asyncio.new_event_loop()
+
 def handler(event, context):
+    """Process publications synchronously, or via the OpenAI Batch API in two phases.
+
+    The batch flow is driven by the event's "phase": "submit" starts a batch and returns
+    {"phase": "ingest", "batch_id": ..., "cached_ids": [...]}, which is the event for the
+    next invocation; batch_id is null when every publication was served from the analyses
+    cache. An ingest invocation returns status 202 with the same event while the batch is running.
+    """
+    phase = (event or {}).get('phase')
     try:
+        # Created on the first invocation and reused by warm invocations of the same
+        # container; building them here turns missing configuration into a 500 response
+        services = get_services()
+
+        if phase == 'submit':
+            submitted = _loop.run_until_complete(submit_publications_batch(services))
+            if not submitted:
+                return {
+                    'statusCode': 200,
+                    'body': orjson.dumps('No publications to submit').decode()
+                }
+            return {
+                'statusCode': 200,
+                'phase': 'ingest',
+                'batch_id': submitted['batch_id'],
+                'cached_ids': submitted['cached_ids'],
+                'body': orjson.dumps(f"Submitted batch {submitted['batch_id']}").decode()
+            }
+
+        if phase == 'ingest':
+            batch_id = event.get('batch_id')
+            cached_ids = event.get('cached_ids', [])
+            if not _loop.run_until_complete(ingest_publications_batch(batch_id, services, cached_ids)):
+                return {
+                    'statusCode': 202,
+                    'phase': 'ingest',
+                    'batch_id': batch_id,
+                    'cached_ids': cached_ids,
+                    'body': orjson.dumps(f'Batch {batch_id} is still running').decode()
+                }
+            return {
+                'statusCode': 200,
+                'body': orjson.dumps(f'Batch {batch_id} ingested successfully').decode()
+            }
+
         # Run the async process_publications function
-        asyncio.run(process_publications())
+        _loop.run_until_complete(process_publications(services))
         
         return {
             'statusCode': 200,
-            'body': json.dumps('Publications processed successfully')
+            'body': orjson.dumps('Publications processed successfully').decode()
         }
     except Exception as e:
         logger.error(f"Lambda execution failed: {e}")
         return {
             'statusCode': 500,
-            'body': json.dumps(f'Error processing publications: {str(e)}')
-        } 
\ No newline at end of file
+            'body': orjson.dumps(f'Error processing publications: {str(e)}').decode()
+        }
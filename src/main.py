@@ -1,14 +1,11 @@
 import asyncio
-import schedule
-import time
 from scraper.scraper import TUMScraper
 from database.supabase_client import SupabaseClient
 from gpt.analyzer import PublicationAnalyzer
 from notifications.notification import NotificationManager
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 import os
-from dotenv import load_dotenv
 
 # Configure logging
 logging.basicConfig(
@@ -17,48 +14,183 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-async def process_publications():
-    try:
-        scraper = TUMScraper()
+# Analysis rows are written in bulk once this many have been collected
+ANALYSIS_FLUSH_SIZE = 50
+
+Services = Tuple[TUMScraper, SupabaseClient, PublicationAnalyzer, NotificationManager]
+
+_services: Optional[Services] = None
+
+def get_services() -> Services:
+    """Return the shared scraper, database, analyzer and notification clients.
+
+    They are created once per process, so warm Lambda invocations reuse their HTTP
+    clients instead of paying the setup cost again.
+    """
+    global _services
+    if _services is None:
         db_client = SupabaseClient()
-        analyzer = PublicationAnalyzer()
-        notifier = NotificationManager()
-
-        # Fetch publications
-        publications = await scraper.fetch_publications()
-        logger.info(f"Fetched {len(publications)} publications")
-        
-        # Process each publication
-        for pub in publications:
-            # Analyze the publication
-            analysis = await analyzer.analyze_publication(pub)
-            if analysis:
-                # Store in database
-                stored_pub = await db_client.store_publication(pub)
-                
+        _services = (TUMScraper(), db_client, PublicationAnalyzer(cache=db_client), NotificationManager())
+    return _services
+
+async def process_publications(services: Optional[Services] = None):
+    notifier = None
+    try:
+        scraper, db_client, analyzer, notifier = services or get_services()
+
+        # Known DOIs and titles let storing skip most existence checks
+        await db_client.load_seen_publications()
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=32)
+        # Analysis rows collected across batches and stored in bulk, so a run that fails
+        # or times out part way still keeps most of what it computed
+        analysis_rows: List[Dict] = []
+        semaphore = asyncio.Semaphore(int(os.getenv("PROCESSING_CONCURRENCY", "10")))
+
+        async def flush_analyses() -> None:
+            # Take the rows before awaiting so concurrent flushes never store a row twice
+            rows = analysis_rows[:]
+            analysis_rows.clear()
+            await db_client.store_analyses_bulk(rows)
+
+        async def notify_one(pub: Dict, analysis: Dict) -> None:
+            async with semaphore:
                 # Send notifications if needed
                 await notifier.process_publication_analysis(pub, analysis)
-                
-            await asyncio.sleep(1)  # Rate limiting
+
+        async def process_batch(batch: List[Dict]) -> None:
+            # Analyze the batch with a single GPT request per pass
+            analyses = await analyzer.analyze_publications_batch(batch)
+
+            analyzed = [(pub, analysis) for pub, analysis in zip(batch, analyses) if analysis]
+
+            # Store all analyzed publications in one bulk call
+            stored = await db_client.store_publications_bulk([pub for pub, _ in analyzed])
+
+            # Link analyses to the newly stored rows; publications stored in earlier runs, with
+            # or without a DOI, are not returned, so each publication gets one analysis row
+            publication_ids = {row.get('doi') or row['title']: row['id'] for row in stored}
+            for pub, analysis in analyzed:
+                publication_id = publication_ids.get(pub.get('doi') or pub['title'])
+                if publication_id:
+                    analysis_rows.append({**analysis, 'publication_id': publication_id})
+            if len(analysis_rows) >= ANALYSIS_FLUSH_SIZE:
+                await flush_analyses()
+
+            # Notify on each analyzed publication concurrently
+            await asyncio.gather(*[notify_one(pub, analysis) for pub, analysis in analyzed])
+
+        async def worker() -> None:
+            while True:
+                batch = [await queue.get()]
+                # Take whatever else is already waiting, up to one analysis batch
+                while len(batch) < analyzer.batch_size and not queue.empty():
+                    batch.append(queue.get_nowait())
+                try:
+                    await process_batch(batch)
+                except Exception as e:
+                    logger.error(f"Error processing publication batch: {e}")
+                finally:
+                    for _ in batch:
+                        queue.task_done()
+
+        # Analyze publications while the scraper is still fetching later pages
+        workers = [asyncio.create_task(worker()) for _ in range(analyzer.concurrency)]
+        try:
+            fetched = 0
+            async for pub in scraper.stream_publications():
+                await queue.put(pub)
+                fetched += 1
+            logger.info(f"Fetched {fetched} publications")
+
+            await queue.join()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            await flush_analyses()
             
     except Exception as e:
         logger.error(f"Error in process_publications: {e}")
+    finally:
+        if notifier:
+            await notifier.close()
+
+async def submit_publications_batch(services: Optional[Services] = None) -> Optional[Dict]:
+    """Scrape and store publications, then submit their analysis to the OpenAI Batch API.
+
+    Publications with an analysis in the cache are not resubmitted. Returns the batch id,
+    None if every pending publication was cached, and the ids of the cached publications,
+    to pass to ingest_publications_batch; returns None if there was nothing to analyze.
+    """
+    scraper, db_client, analyzer, _ = services or get_services()
+
+    publications = await scraper.fetch_publications()
+    logger.info(f"Fetched {len(publications)} publications")
+
+    # Batch requests are matched back to publications by their database id. The seen
+    # publications cache is bypassed here, as stored rows are needed to resubmit
+    # publications that were never processed. The client outlives invocations, so the
+    # cache may hold DOIs stored by earlier runs.
+    stored = await db_client.store_publications_bulk(publications, skip_seen=False)
+    # Without an abstract there is nothing for GPT to assess
+    pending = [pub for pub in stored if pub and not pub.get('processed') and (pub.get('abstract') or '').strip()]
+    if not pending:
+        logger.info("No unprocessed publications to submit")
+        return None
+
+    cached = await analyzer.get_cached_analyses(pending)
+    cached_ids = [str(pub['id']) for pub, analysis in zip(pending, cached) if analysis]
+    uncached = [pub for pub, analysis in zip(pending, cached) if not analysis]
+    logger.info(f"Found cached analyses for {len(cached_ids)} of {len(pending)} publications")
+
+    batch_id = await analyzer.submit_batch(uncached) if uncached else None
+    return {'batch_id': batch_id, 'cached_ids': cached_ids}
+
+async def ingest_publications_batch(
+    batch_id: Optional[str], services: Optional[Services] = None, cached_ids: Optional[List[str]] = None
+) -> bool:
+    """Score and notify on the results of a finished batch, and on the cached publications.
+
+    Returns False while the batch is still running so the caller can poll again later.
+    Raises if the batch produced no results or its publications could not be fetched,
+    so the results are not reported as ingested; the output stays retrievable for a retry.
+    """
+    _, db_client, analyzer, notifier = services or get_services()
+    cached_ids = cached_ids or []
+
+    publications: List[Dict] = []
+    analyses: List[Optional[Dict]] = []
+    if batch_id:
+        initial_analyses = await analyzer.retrieve_batch(batch_id)
+        if initial_analyses is None:
+            logger.info(f"Batch {batch_id} is still running")
+            return False
+
+        if not initial_analyses:
+            raise RuntimeError(f"Batch {batch_id} finished without results")
+
+        publications = await db_client.get_publications(list(initial_analyses))
+        if len(publications) < len(initial_analyses):
+            raise RuntimeError(
+                f"Fetched {len(publications)} of {len(initial_analyses)} publications for batch {batch_id}"
+            )
+        analyses = await analyzer.analyze_batch_results(publications, initial_analyses)
+
+    if cached_ids:
+        # Publications that were not resubmitted are served from the analyses cache
+        cached_publications = await db_client.get_publications(cached_ids)
+        publications += cached_publications
+        analyses += await analyzer.get_cached_analyses(cached_publications)
+
+    try:
+        for pub, analysis in zip(publications, analyses):
+            if analysis:
+                await notifier.process_publication_analysis(pub, analysis)
+                await db_client.mark_as_processed(pub['id'])
+        await db_client.store_analyses_bulk([analysis for analysis in analyses if analysis])
+    finally:
+        await notifier.close()
 
-def run_scheduler():
-    logger.info("Starting scheduler")
-    
-    # Schedule weekly runs
-    schedule.every().monday.at("00:00").do(lambda: asyncio.run(process_publications()))
-    
-    # Also allow manual runs
-    if os.getenv("RUN_IMMEDIATELY", "false").lower() == "true":
-        asyncio.run(process_publications())
-    
-    # Keep the scheduler running
-    while True:
-        schedule.run_pending()
-        time.sleep(60)
-
-if __name__ == "__main__":
-    load_dotenv()
-    run_scheduler() 
\ No newline at end of file
+    logger.info(f"Ingested batch {batch_id} with {len(publications)} publications")
+    return True
@@ -1,19 +1,94 @@
 import os
 from typing import Dict, Optional, List
 import logging
-import aiohttp
+import asyncio
+import aiosmtplib
 from datetime import datetime
 from dotenv import load_dotenv
-import json
+from utils.http import HTTP
+import orjson
+from jinja2 import Template
 
 load_dotenv()
 
+EMAIL_TEMPLATE_SRC = """
+        <html>
+            <body>
+                <h2>🚀 High-Potential Publication Detected</h2>
+                <h3>Publication Details</h3>
+                <p><strong>Title:</strong> {{ title }}</p>
+                <p><strong>Authors:</strong> {{ authors }}</p>
+                <p><strong>Department:</strong> {{ department }}</p>
+                <p><strong>Score:</strong> {{ score }}/10</p>
+                
+                <h3>Analysis Summary</h3>
+                <p>{{ summary }}</p>
+                
+                <h3>Key Metrics</h3>
+                <ul>
+                    <li>Time to Market: {{ time_to_market }} months</li>
+                    <li>Investment Level: {{ investment_level }}</li>
+                    <li>Risk Level: {{ risk_level }}</li>
+                </ul>
+                
+                <h3>Next Steps</h3>
+                <ul>
+                    {% for step in next_steps %}<li>{{ step }}</li>{% endfor %}
+                </ul>
+                
+                <p><a href="{{ url }}">View Publication</a></p>
+            </body>
+        </html>
+        """
+
+# The static header is shared by every Slack message; it is only serialized, never mutated
+SLACK_HEADER_BLOCK = {
+    "type": "header",
+    "text": {
+        "type": "plain_text",
+        "text": "🚀 High-Potential Publication Detected!"
+    }
+}
+
 class NotificationManager:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.webhook_url = os.getenv("NOTIFICATION_WEBHOOK_URL")
         self.score_threshold = float(os.getenv("SCORE_THRESHOLD", "7.0"))  # Default threshold of 7.0
         self.notification_channels = self._load_notification_channels()
+        # Jinja2 compiles the email template once; autoescape keeps scraped text from breaking the HTML
+        self._email_template = Template(EMAIL_TEMPLATE_SRC, autoescape=True)
+        # Created on first use so they belong to the running event loop
+        self._smtp: Optional[aiosmtplib.SMTP] = None
+        self._smtp_lock: Optional[asyncio.Lock] = None
+
+    async def _get_smtp(self) -> aiosmtplib.SMTP:
+        """Return a logged-in SMTP client, reusing the connection across notifications"""
+        if self._smtp is None or not self._smtp.is_connected:
+            config = self.notification_channels['email']
+            smtp = aiosmtplib.SMTP(
+                hostname=config['smtp_server'],
+                port=int(config['smtp_port']),
+                start_tls=True
+            )
+            try:
+                await smtp.connect()
+                await smtp.login(config['smtp_user'], config['smtp_password'])
+            except Exception:
+                smtp.close()
+                raise
+            # Only cached once logged in, so a failed login is retried on the next email
+            self._smtp = smtp
+        return self._smtp
+
+    async def close(self) -> None:
+        """Close the SMTP connection"""
+        if self._smtp is not None and self._smtp.is_connected:
+            try:
+                await self._smtp.quit()
+            except aiosmtplib.SMTPException as e:
+                self.logger.warning(f"Error closing SMTP connection: {e}")
+        self._smtp = None
 
     def _load_notification_channels(self) -> Dict:
         """Load notification channel configurations"""
@@ -102,9 +177,12 @@ class NotificationManager:
 
             message = self._format_slack_message(notification_data)
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(webhook_url, json=message) as response:
-                    response.raise_for_status()
+            response = await HTTP.post(
+                webhook_url,
+                content=orjson.dumps(message),
+                headers={'Content-Type': 'application/json'}
+            )
+            response.raise_for_status()
                     
         except Exception as e:
             self.logger.error(f"Error sending Slack notification: {e}")
@@ -113,13 +191,7 @@ class NotificationManager:
         """Format notification data for Slack"""
         return {
             "blocks": [
-                {
-                    "type": "header",
-                    "text": {
-                        "type": "plain_text",
-                        "text": "🚀 High-Potential Publication Detected!"
-                    }
-                },
+                SLACK_HEADER_BLOCK,
                 {
                     "type": "section",
                     "fields": [
@@ -159,7 +231,6 @@ class NotificationManager:
     async def _send_email_notification(self, notification_data: Dict) -> None:
         """Send notification via email"""
         try:
-            import smtplib
             from email.mime.text import MIMEText
             from email.mime.multipart import MIMEMultipart
             
@@ -173,42 +244,33 @@ class NotificationManager:
             body = self._format_email_body(notification_data)
             message.attach(MIMEText(body, "html"))
             
-            with smtplib.SMTP(config['smtp_server'], int(config['smtp_port'])) as server:
-                server.starttls()
-                server.login(config['smtp_user'], config['smtp_password'])
-                server.send_message(message)
+            if self._smtp_lock is None:
+                self._smtp_lock = asyncio.Lock()
+            
+            # One message at a time over the shared connection
+            async with self._smtp_lock:
+                try:
+                    await (await self._get_smtp()).send_message(message)
+                except aiosmtplib.SMTPServerDisconnected:
+                    # The server may drop idle connections between bursts; reconnect once
+                    self._smtp = None
+                    await (await self._get_smtp()).send_message(message)
                 
         except Exception as e:
             self.logger.error(f"Error sending email notification: {e}")
 
     def _format_email_body(self, data: Dict) -> str:
         """Format notification data as HTML email"""
-        return f"""
-        <html>
-            <body>
-                <h2>🚀 High-Potential Publication Detected</h2>
-                <h3>Publication Details</h3>
-                <p><strong>Title:</strong> {data['publication']['title']}</p>
-                <p><strong>Authors:</strong> {', '.join(data['publication']['authors'])}</p>
-                <p><strong>Department:</strong> {data['publication']['department']}</p>
-                <p><strong>Score:</strong> {data['analysis']['score']}/10</p>
-                
-                <h3>Analysis Summary</h3>
-                <p>{data['analysis']['summary']}</p>
-                
-                <h3>Key Metrics</h3>
-                <ul>
-                    <li>Time to Market: {data['analysis']['key_metrics'].get('estimated_time_to_market', 'N/A')} months</li>
-                    <li>Investment Level: {data['analysis']['key_metrics'].get('required_investment_level', 'N/A')}</li>
-                    <li>Risk Level: {data['analysis']['key_metrics'].get('risk_level', 'N/A')}</li>
-                </ul>
-                
-                <h3>Next Steps</h3>
-                <ul>
-                    {''.join(f'<li>{step}</li>' for step in data['analysis']['recommendations'].get('next_steps', []))}
-                </ul>
-                
-                <p><a href="{data['publication']['url']}">View Publication</a></p>
-            </body>
-        </html>
-        """
+        key_metrics = data['analysis']['key_metrics']
+        return self._email_template.render(
+            title=data['publication']['title'],
+            authors=', '.join(data['publication']['authors']),
+            department=data['publication']['department'],
+            score=data['analysis']['score'],
+            summary=data['analysis']['summary'],
+            time_to_market=key_metrics.get('estimated_time_to_market', 'N/A'),
+            investment_level=key_metrics.get('required_investment_level', 'N/A'),
+            risk_level=key_metrics.get('risk_level', 'N/A'),
+            next_steps=data['analysis']['recommendations'].get('next_steps', []),
+            url=data['publication']['url']
+        )
@@ -1,29 +1,110 @@
 import aiohttp
-from bs4 import BeautifulSoup
-from typing import List, Dict
+from aiolimiter import AsyncLimiter
+from lxml import etree
+from typing import List, Dict, AsyncIterator, Optional, Tuple
 import logging
 import asyncio
+import os
+import re
+import shelve
+import threading
+from collections import deque
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
 from datetime import datetime
+from functools import lru_cache
+
+# Date formats used on the portal, each with a cheap pattern check so strptime only runs on the format that fits
+_DATE_FORMATS = [
+    (re.compile(r'^\d{4}-\d{1,2}-\d{1,2}$'), '%Y-%m-%d'),
+    (re.compile(r'^\d{1,2}\.\d{1,2}\.\d{4}$'), '%d.%m.%Y'),
+    (re.compile(r'^[A-Z][a-z]+ \d{1,2}, \d{4}$'), '%B %d, %Y'),
+]
+
+# Publication fields by (tag, class) of the element holding them
+_PUBLICATION_FIELDS = {
+    ('h3', 'title'): 'title',
+    ('div', 'authors'): 'authors',
+    ('div', 'abstract'): 'abstract',
+    ('span', 'date'): 'date',
+    ('div', 'department'): 'department',
+    ('a', 'publication-link'): 'link',
+    ('span', 'doi'): 'doi',
+    ('span', 'type'): 'type',
+}
+
+# Author lists are split on semicolons when present, since names may then be "Last, First"
+_AUTHOR_SPLIT_SEMICOLON = re.compile(r'\s*;\s*')
+_AUTHOR_SPLIT_COMMA = re.compile(r'\s*,\s*')
+
+# Page number in pagination links like "?page=12"
+_PAGE_NUMBER = re.compile(r'[?&]page=(\d+)')
+
+# DOI texts look like "DOI: 10.1234/abcd"
+_DOI_PREFIX = re.compile(r'^\s*DOI:\s*')
+
+@lru_cache(maxsize=4096)
+def _parse_date(date_str: str) -> str:
+    """Convert a portal date to ISO format, returning it unchanged if no format matches"""
+    stripped = date_str.strip()
+    for pattern, fmt in _DATE_FORMATS:
+        if pattern.match(stripped):
+            try:
+                return datetime.strptime(stripped, fmt).isoformat()
+            except ValueError:
+                break
+    return date_str
+
+# Parsers for whole-page parsing, reused per thread and encoding
+_thread_parsers = threading.local()
+
+@dataclass
+class Publication:
+    """A scraped publication, kept slotted while pages are parsed and cached"""
+    # Declared by hand, as dataclass(slots=True) needs Python 3.10
+    __slots__ = (
+        'title', 'authors', 'abstract', 'publication_date', 'department',
+        'url', 'doi', 'publication_type', 'scraped_at'
+    )
+    title: str
+    authors: List[str]
+    abstract: str
+    publication_date: str
+    department: str
+    url: str
+    doi: str
+    publication_type: str
+    scraped_at: str
+
+    def to_dict(self) -> Dict:
+        return {field: getattr(self, field) for field in self.__slots__}
 
 class TUMScraper:
-    def __init__(self):
-        self.base_url = "https://portal.fis.tum.de/en/publications/"
+    def __init__(self, parse_processes: Optional[int] = None):
+        self.base_host = "https://portal.fis.tum.de"
+        self.base_url = f"{self.base_host}/en/publications/"
         self.logger = logging.getLogger(__name__)
         self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            # aiohttp decompresses Brotli responses when the Brotli package is installed
+            'Accept-Encoding': 'br, gzip'
         }
+        # Pages are fetched this many at a time
+        self.concurrency = int(os.getenv("SCRAPER_CONCURRENCY", "4"))
+        # Token bucket keeping the portal requests at a polite rate while allowing short bursts
+        self._limiter = AsyncLimiter(float(os.getenv("SCRAPER_MAX_REQUESTS_PER_SECOND", "5")), 1.0)
+        # Worker processes for page parsing; 0 parses on the event loop while streaming,
+        # which also suits AWS Lambda where multiprocessing lacks /dev/shm
+        if parse_processes is None:
+            parse_processes = int(os.getenv("SCRAPER_PARSE_PROCESSES", "0"))
+        self._parse_pool = ProcessPoolExecutor(max_workers=parse_processes) if parse_processes > 0 else None
+        # Validators and parsed publications per page, for conditional requests on later runs
+        self.cache_path = os.getenv("SCRAPER_CACHE_PATH", "/tmp/scraper_cache")
 
     async def fetch_publications(self) -> List[Dict]:
         try:
-            publications = []
-            page = 1
-            while True:
-                page_publications = await self._fetch_page(page)
-                if not page_publications:
-                    break
-                publications.extend(page_publications)
-                page += 1
-                await asyncio.sleep(1)  # Polite delay between pages
+            publications = [publication async for publication in self.stream_publications()]
             
             self.logger.info(f"Successfully scraped {len(publications)} publications")
             return publications
@@ -32,98 +113,272 @@ class TUMScraper:
             self.logger.error(f"Error fetching publications: {e}")
             return []
 
-    async def _fetch_page(self, page: int) -> List[Dict]:
+    async def stream_publications(self) -> AsyncIterator[Dict]:
+        """Yield publications in page order as soon as each batch of pages is scraped"""
+        # One session for all pages so keep-alive connections to the portal are reused
+        with shelve.open(self.cache_path) as cache:
+            async with aiohttp.ClientSession(
+                headers=self.headers,
+                connector=aiohttp.TCPConnector(limit=16, ttl_dns_cache=300)
+            ) as session:
+                semaphore = asyncio.Semaphore(self.concurrency)
+
+                page_publications, last_page = await self._fetch_page(session, 1, semaphore, cache)
+                if not page_publications:
+                    return
+                for publication in page_publications:
+                    yield publication.to_dict()
+
+                if last_page:
+                    # The page count is known, so keep a window of pages in flight and yield
+                    # them in order. The next page only starts once the oldest one has been
+                    # consumed, so a slow consumer holds back the crawl.
+                    pages = iter(range(2, last_page + 1))
+                    tasks = deque(
+                        asyncio.create_task(self._fetch_page(session, page, semaphore, cache))
+                        for page in islice(pages, self.concurrency)
+                    )
+                    try:
+                        while tasks:
+                            page_publications, _ = await tasks.popleft()
+                            for publication in page_publications:
+                                yield publication.to_dict()
+                            for page in islice(pages, 1):
+                                tasks.append(asyncio.create_task(self._fetch_page(session, page, semaphore, cache)))
+                    finally:
+                        for task in tasks:
+                            task.cancel()
+                    return
+
+                # Without pagination, probe the next batch of pages concurrently; the
+                # first empty page ends the listing
+                page = 2
+                while True:
+                    results = await asyncio.gather(*[
+                        self._fetch_page(session, batch_page, semaphore, cache)
+                        for batch_page in range(page, page + self.concurrency)
+                    ])
+                    for page_publications, _ in results:
+                        if not page_publications:
+                            return
+                        for publication in page_publications:
+                            yield publication.to_dict()
+                    page += self.concurrency
+
+    async def _fetch_page(self, session: aiohttp.ClientSession, page: int, semaphore: asyncio.Semaphore, cache: shelve.Shelf) -> Tuple[List[Publication], Optional[int]]:
+        """Fetch and parse a listing page, returning its publications and the last page number if listed"""
         try:
-            async with aiohttp.ClientSession(headers=self.headers) as session:
-                url = f"{self.base_url}?page={page}"
-                async with session.get(url) as response:
+            url = f"{self.base_url}?page={page}"
+            cached = cache.get(url)
+            headers = {}
+            if cached:
+                if cached['etag']:
+                    headers['If-None-Match'] = cached['etag']
+                if cached['last_modified']:
+                    headers['If-Modified-Since'] = cached['last_modified']
+
+            async with semaphore, self._limiter:
+                async with session.get(url, headers=headers) as response:
+                    # Every publication on the page was scraped at the same moment
+                    scraped_at = datetime.utcnow().isoformat()
+
+                    # Unchanged page, so skip downloading and parsing it again
+                    if response.status == 304 and cached:
+                        publications = [replace(publication, scraped_at=scraped_at) for publication in cached['publications']]
+                        return publications, cached.get('last_page')
                     response.raise_for_status()
-                    html = await response.text()
-                    
-            soup = BeautifulSoup(html, 'html.parser')
-            publications = []
-            
-            # Find the main publications container
-            pub_container = soup.find('div', class_='publications-list')
-            if not pub_container:
-                return []
-
-            # Process each publication entry
-            for pub_div in pub_container.find_all('div', class_='publication-item'):
-                try:
-                    publication = {
-                        'title': self._extract_text(pub_div.find('h3', class_='title')),
-                        'authors': self._extract_authors(pub_div.find('div', class_='authors')),
-                        'abstract': self._extract_text(pub_div.find('div', class_='abstract')),
-                        'publication_date': self._parse_date(
-                            self._extract_text(pub_div.find('span', class_='date'))
-                        ),
-                        'department': self._extract_text(pub_div.find('div', class_='department')),
-                        'url': self._extract_url(pub_div.find('a', class_='publication-link')),
-                        'doi': self._extract_doi(pub_div),
-                        'publication_type': self._extract_text(pub_div.find('span', class_='type')),
-                        'scraped_at': datetime.utcnow().isoformat(),
-                    }
-                    
-                    if self._is_valid_publication(publication):
-                        publications.append(publication)
-                        
-                except Exception as e:
-                    self.logger.error(f"Error processing publication: {e}")
-                    continue
+                    etag = response.headers.get('ETag')
+                    last_modified = response.headers.get('Last-Modified')
+
+                    # None when the Content-Type has no charset, leaving detection to libxml2
+                    encoding = response.charset
+
+                    if self._parse_pool:
+                        data = await response.read()
+                    else:
+                        # Extract entries while the rest of the page is still downloading
+                        publications = []
+                        last_page = None
+                        parser = self._create_parser(encoding)
+                        async for chunk in response.content.iter_chunked(64 * 1024):
+                            parser.feed(chunk)
+                            last_page = self._read_events(parser, scraped_at, publications) or last_page
+                        parser.close()
+                        last_page = self._read_events(parser, scraped_at, publications) or last_page
+
+            if self._parse_pool:
+                # Parse in a worker process so pages parse on several cores while fetching continues
+                publications, last_page = await asyncio.get_running_loop().run_in_executor(
+                    self._parse_pool, _parse_page, data, encoding, scraped_at
+                )
+
+            if etag or last_modified:
+                cache[url] = {
+                    'etag': etag,
+                    'last_modified': last_modified,
+                    'publications': publications,
+                    'last_page': last_page
+                }
             
-            return publications
+            return publications, last_page
             
         except Exception as e:
             self.logger.error(f"Error fetching page {page}: {e}")
-            return []
+            return [], None
+
+    def _create_parser(self, encoding: Optional[str]) -> etree.HTMLPullParser:
+        """Create a pull parser that hands over each element once it is complete.
+
+        The raw bytes go straight to libxml2, which decodes them in C and detects the
+        charset from <meta> when no encoding is given. Only div end events are
+        reported, so other elements never reach Python.
+        """
+        return etree.HTMLPullParser(events=('end',), tag='div', encoding=encoding)
+
+    def _parse_page(self, data: bytes, encoding: Optional[str], scraped_at: str) -> Tuple[List[Publication], Optional[int]]:
+        """Parse a complete listing page"""
+        # A whole page is parsed in one go, so the parser can be reused for the next page
+        # instead of being set up again. Streamed pages interleave and need their own.
+        parsers = getattr(_thread_parsers, 'by_encoding', None)
+        if parsers is None:
+            parsers = _thread_parsers.by_encoding = {}
+        parser = parsers.pop(encoding, None)
+        if parser is None:
+            parser = self._create_parser(encoding)
+
+        publications = []
+        parser.feed(data)
+        parser.close()
+        last_page = self._read_events(parser, scraped_at, publications)
+
+        # Only handed back after a clean parse, so a failed page never leaves state behind
+        parsers[encoding] = parser
+        return publications, last_page
+
+    def _read_events(self, parser: etree.HTMLPullParser, scraped_at: str, publications: List[Publication]) -> Optional[int]:
+        """Add the publication entries completed since the last call to publications.
+
+        Returns the last page number once the pagination has been parsed.
+        """
+        last_page = None
+        # Bound once, as these are looked up for every element of the page
+        is_publication_item = self._is_publication_item
+        parse_publication = self._parse_publication
+        append = publications.append
+        for _, element in parser.read_events():
+            if not is_publication_item(element):
+                if 'pagination' in (element.get('class') or '').split():
+                    last_page = self._extract_last_page(element)
+                continue
+            publication = parse_publication(element, scraped_at)
+            element.clear()
+            if publication:
+                append(publication)
+        return last_page
+
+    def _extract_last_page(self, pagination_div) -> Optional[int]:
+        """Read the page count from the pagination's link to the last page"""
+        for link in pagination_div.iterfind(".//*[@class]/a[@href]"):
+            if 'last' not in link.getparent().get('class').split():
+                continue
+            match = _PAGE_NUMBER.search(link.get('href'))
+            if match:
+                return int(match.group(1))
+        return None
+
+    def _is_publication_item(self, element) -> bool:
+        """Check for a div.publication-item inside the div.publications-list container"""
+        if 'publication-item' not in (element.get('class') or '').split():
+            return False
+        return any(
+            'publications-list' in (ancestor.get('class') or '').split()
+            for ancestor in element.iterancestors('div')
+        )
+
+    def _parse_publication(self, pub_div, scraped_at: str) -> Optional[Publication]:
+        try:
+            field = self._find_fields(pub_div).get
+            extract_text = self._extract_text
+
+            # Reject incomplete entries before doing any work on the other fields
+            title = extract_text(field('title'))
+            authors = self._extract_authors(field('authors'))
+            if not self._is_valid_publication(title, authors):
+                return None
+
+            return Publication(
+                title=title,
+                authors=authors,
+                abstract=extract_text(field('abstract')),
+                publication_date=self._parse_date(
+                    extract_text(field('date'))
+                ),
+                department=extract_text(field('department')),
+                url=self._extract_url(field('link')),
+                doi=self._extract_doi(field('doi')),
+                publication_type=extract_text(field('type')),
+                scraped_at=scraped_at,
+            )
+                
+        except Exception as e:
+            self.logger.error(f"Error processing publication: {e}")
+            return None
+
+    def _find_fields(self, pub_div) -> Dict:
+        """Collect the first element of each publication field in one walk over the entry"""
+        fields = {}
+        field_for = _PUBLICATION_FIELDS.get
+        for node in pub_div.iter(etree.Element):
+            classes = node.get('class')
+            if not classes:
+                continue
+            tag = node.tag
+            for class_name in classes.split():
+                field = field_for((tag, class_name))
+                if field and field not in fields:
+                    fields[field] = node
+        return fields
 
     def _extract_text(self, element) -> str:
-        return element.get_text(strip=True) if element else ""
+        if element is None:
+            return ""
+        return "".join(text.strip() for text in element.itertext())
     
     def _extract_authors(self, authors_div) -> List[str]:
-        if not authors_div:
+        if authors_div is None:
             return []
         # Handle different author formats (comma-separated, semicolon-separated, etc.)
-        text = authors_div.get_text(strip=True)
-        authors = []
-        for separator in [';', ',']:
-            if separator in text:
-                authors = [author.strip() for author in text.split(separator)]
-                break
-        if not authors:
-            authors = [text]
-        return [author for author in authors if author]
+        text = self._extract_text(authors_div)
+        if not text:
+            return []
+        separator = _AUTHOR_SPLIT_SEMICOLON if ';' in text else _AUTHOR_SPLIT_COMMA
+        return [author for author in separator.split(text) if author]
 
     def _extract_url(self, link_element) -> str:
-        if not link_element:
+        if link_element is None:
             return ""
-        url = link_element.get('href', '')
-        if url and not url.startswith(('http://', 'https://')):
-            url = f"https://portal.fis.tum.de{url}"
-        return url
-
-    def _extract_doi(self, pub_div) -> str:
-        doi_element = pub_div.find('span', class_='doi')
-        if doi_element:
-            doi_text = self._extract_text(doi_element)
-            # Extract DOI from text like "DOI: 10.1234/abcd"
-            return doi_text.replace('DOI:', '').strip()
+        url = link_element.get('href') or ''
+        # Links are either absolute or relative to the portal
+        return url if not url or url[:4] == 'http' else self.base_host + url
+
+    def _extract_doi(self, doi_element) -> str:
+        if doi_element is not None:
+            return _DOI_PREFIX.sub('', self._extract_text(doi_element)).strip()
         return ""
 
     def _parse_date(self, date_str: str) -> str:
-        try:
-            # Handle different date formats
-            for fmt in ['%Y-%m-%d', '%d.%m.%Y', '%B %d, %Y']:
-                try:
-                    return datetime.strptime(date_str.strip(), fmt).isoformat()
-                except ValueError:
-                    continue
-            return date_str
-        except Exception:
-            return date_str
-
-    def _is_valid_publication(self, publication: Dict) -> bool:
+        # Many publications share a date, so parsed dates are memoized
+        return _parse_date(date_str)
+
+    def _is_valid_publication(self, title: str, authors: List[str]) -> bool:
         """Check if the publication has the minimum required fields"""
-        required_fields = ['title', 'authors']
-        return all(publication.get(field) for field in required_fields) 
\ No newline at end of file
+        return bool(title) and bool(authors)
+
+_worker_scraper: Optional[TUMScraper] = None
+
+def _parse_page(data: bytes, encoding: Optional[str], scraped_at: str) -> Tuple[List[Publication], Optional[int]]:
+    """Parse a listing page in a worker process, reusing one scraper per process"""
+    global _worker_scraper
+    if _worker_scraper is None:
+        _worker_scraper = TUMScraper(parse_processes=0)
+    return _worker_scraper._parse_page(data, encoding, scraped_at)
@@ -0,0 +1,9 @@
+import httpx
+
+# One connection pool shared by the OpenAI client and Slack notifications. HTTP/2
+# multiplexes concurrent requests to the same host over a single TCP+TLS connection.
+HTTP = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+    timeout=30
+)
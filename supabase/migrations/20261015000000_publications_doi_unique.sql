@@ -0,0 +1,11 @@
+-- Let store_publications_bulk upsert on doi instead of checking each publication first.
+
+-- Publications without a DOI used to be stored with an empty string
+update publications set doi = null where doi = '';
+
+alter table publications alter column processed set default false;
+
+create unique index if not exists publications_doi_key on publications (doi);
+
+-- Publications without a DOI are still deduplicated by title and authors
+create index if not exists publications_title_without_doi_idx on publications (title) where doi is null;
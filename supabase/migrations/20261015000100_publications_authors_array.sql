@@ -0,0 +1,13 @@
+-- Store authors as text[] so duplicate checks can use the && (overlap) operator in the database.
+
+alter table publications add column authors_array text[];
+
+update publications set authors_array = array(select jsonb_array_elements_text(authors::jsonb));
+
+alter table publications drop column authors;
+
+alter table publications rename column authors_array to authors;
+
+alter table publications alter column authors set not null;
+
+create index if not exists publications_authors_idx on publications using gin (authors);
@@ -0,0 +1,13 @@
+-- Analysis results of publications, written in one bulk insert per run.
+
+create table if not exists publication_analyses (
+    id bigint generated always as identity primary key,
+    publication_id uuid not null references publications (id) on delete cascade,
+    analysis_timestamp timestamptz not null default now(),
+    startup_potential_score real not null,
+    detailed_analysis jsonb not null,
+    key_metrics jsonb not null,
+    recommendations jsonb not null
+);
+
+create index if not exists publication_analyses_publication_id_idx on publication_analyses (publication_id);
@@ -0,0 +1,7 @@
+-- Analyses keyed by sha256(title || abstract), so unchanged publications are not sent to GPT again.
+
+create table if not exists analyses_cache (
+    hash text primary key,
+    result jsonb not null,
+    created_at timestamptz not null default now()
+);